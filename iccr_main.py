@@ -2,10 +2,6 @@ import os
 import json
 import glob
 import datetime
-import sys
-
-# Ensure src is in path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from src.config import ICCR_CONFIG, ICCR_DATA_DIR, RESULTS_DIR
 from src.iccr.evaluator import run_iccr_agent_loop
@@ -1,9 +1,5 @@
 import os
 import json
-import sys
-
-# Ensure src is in path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from src.config import ICCR_CONFIG, ICCR_DATA_DIR
 from src.generation.iccr_problem_generator import generate_type_a, generate_type_b, generate_type_c
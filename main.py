@@ -1,20 +1,16 @@
-# main.py (New, Thinner Version)
+# main.py
 
 import os
-import sys
 from datetime import datetime
 
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-
-
-from src.config import RESULTS_DIR, TOLERANCE, SLEEP_TIME
+from src.config import RESULTS_DIR, TOLERANCE, SLEEP_TIME, CONCURRENCY
 from src.utils import load_benchmark
 from src.analysis.reporting import log_final_report
 
-from src.monitoring.logger import setup_logger, get_logger
+from src.monitoring.logger import setup_logger
 from src.monitoring.tracker import ResultTracker
 from src.analysis.evaluator import run_evaluation
-from src.analysis.calculator import calculate_accuracies, calculate_cds
+from src.analysis.calculator import compute_metrics
 
 
 def main():
@@ -40,19 +36,17 @@ def main():
         logger.error("Benchmark loading failed. Exiting.")
         return
 
-    # Step 2 & 3: Run evaluation
-    results = run_evaluation(benchmark, tracker, TOLERANCE, SLEEP_TIME)
-
-    # Step 3 (part 2): Calculate Accuracies
-    accuracies = calculate_accuracies(results)
+    # Step 2 & 3: Run evaluation (leaving the block flushes and closes the results file)
+    with tracker:
+        results = run_evaluation(benchmark, tracker, TOLERANCE, SLEEP_TIME, CONCURRENCY)
 
-    # Step 4 & 5: Calculate CDS
-    cds_score = calculate_cds(accuracies)
+    # Step 3 (part 2) & 4: Accuracies, CDS and Robust Score
+    metrics = compute_metrics(results)
 
     # --- 5. Final Report (Now a clean, single function call) ---
     log_final_report(
-        accuracies=accuracies,
-        cds_score=cds_score,
+        accuracies=metrics.accuracies,
+        cds_score=metrics.robust_score,
         results_filename=os.path.basename(results_filename),
         benchmark_filename=os.path.basename(load_benchmark.last_loaded_file)
     )
@@ -4,7 +4,14 @@ import re
 import sys
 import argparse
 import numpy as np
-from sklearn.metrics import auc
+
+# np.trapz was renamed np.trapezoid in NumPy 2.0 (and later removed)
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+# 1. Regex to match lines like: "Level 0: 100.00%"
+# Captures: Level (group 1) and Percentage (group 2)
+# Compiled once; re.ASCII since level numbers are plain digits
+_PATTERN = re.compile(r"Level\s+(\d+):\s+(\d+\.?\d*)%", re.ASCII)
 
 def parse_and_evaluate(log_filepath):
     """
@@ -13,27 +20,25 @@ def parse_and_evaluate(log_filepath):
     """
     print(f"--- Analyzing Log: {log_filepath} ---")
     
+    data_map = {}
+    
+    # Stream the log so memory stays O(line) instead of O(file)
     try:
-        with open(log_filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with open(log_filepath, 'r', encoding='utf-8', buffering=65536) as f:
+            for line in f:
+                # Cheap substring test first; most log lines never reach the regex
+                if 'Level' not in line:
+                    continue
+                match = _PATTERN.search(line)
+                if match:
+                    level = int(match.group(1))
+                    acc_pct = float(match.group(2))
+                    # Store as decimal (0.0 - 1.0)
+                    data_map[level] = acc_pct / 100.0
     except FileNotFoundError:
         print(f"Error: File not found at {log_filepath}")
         return
 
-    # 1. Regex to match lines like: "Level 0: 100.00%"
-    # Captures: Level (group 1) and Percentage (group 2)
-    pattern = re.compile(r"Level\s+(\d+):\s+(\d+\.?\d*)%")
-    
-    data_map = {}
-    
-    for line in content.splitlines():
-        match = pattern.search(line)
-        if match:
-            level = int(match.group(1))
-            acc_pct = float(match.group(2))
-            # Store as decimal (0.0 - 1.0)
-            data_map[level] = acc_pct / 100.0
-
     if not data_map:
         print("No accuracy data found. Ensure the log contains lines like 'Level X: Y%'.")
         return
@@ -45,34 +50,30 @@ def parse_and_evaluate(log_filepath):
     print(f"Found {len(levels)} levels: {dict(zip(levels, accuracies))}")
     print("-" * 40)
 
+    x = np.array(levels)
+    y = np.array(accuracies)
+
     # =========================================
     # METRIC 1: Old CDS (Average Drop)
     # =========================================
-    drops = []
-    for i in range(len(accuracies) - 1):
-        # Drop = Previous - Current
-        d = accuracies[i] - accuracies[i+1]
-        drops.append(d)
+    # Drop = Previous - Current
+    drops = -np.diff(y)
     
-    avg_drop = np.mean(drops) if drops else 0
+    avg_drop = drops.mean() if drops.size else 0
     old_score = 1.0 - avg_drop
 
     # =========================================
     # METRIC 2: New Robust Score (Max-Drop Penalized AUC)
     # =========================================
     # A. Performance: Area Under Curve
-    x = np.array(levels)
-    y = np.array(accuracies)
-    
     # Normalize AUC by the depth range (e.g. 5) to get 0-1
     if x[-1] - x[0] == 0:
         perf_auc = 0.0
     else:
-        perf_auc = auc(x, y) / (x[-1] - x[0])
+        perf_auc = _trapezoid(y, x) / (x[-1] - x[0])
     
     # B. Stability: Find the "Cliff" (Max positive drop)
-    valid_drops = [max(0, d) for d in drops]
-    max_cliff = max(valid_drops) if valid_drops else 0.0
+    max_cliff = float(np.maximum(drops, 0).max()) if drops.size else 0.0
     
     # C. Penalty Calculation
     # We penalize the AUC by the size of the cliff.
@@ -1,77 +1,166 @@
-import os
-import sys
+import logging
 import numpy as np
-from typing import List, Dict, Any
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Tuple
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from src.monitoring.logger import get_logger
+logger = logging.getLogger(__name__)
 
-def calculate_accuracies(results: List[Dict[str, Any]]) -> Dict[int, float]:
+
+@dataclass
+class LevelAccuracies:
+    """Accuracy per measured complexity level, as parallel arrays sorted by level."""
+    levels: np.ndarray      # int64 level (ops count)
+    accuracies: np.ndarray  # float64 accuracy at that level
+
+    def __len__(self) -> int:
+        return self.levels.size
+
+    def items(self) -> Iterator[Tuple[int, float]]:
+        return zip(self.levels.tolist(), self.accuracies.tolist())
+
+
+_EMPTY_ACCURACIES = LevelAccuracies(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+
+# Below this many results, Counter beats np.array + bincount setup cost
+_COUNTER_MAX_N = 1000
+
+
+@dataclass
+class DecayMetrics:
+    """Accuracy table plus every decay metric derived from it."""
+    accuracies: LevelAccuracies
+    perf_score: float    # mean accuracy across measured levels
+    max_cliff: float     # largest single-step accuracy drop
+    cds_score: float     # old CDS: 1 - mean consecutive drop
+    robust_score: float  # perf_score * (1 - max_cliff), floored at 0
+
+
+# A sweep has a few dozen levels, where the plain loop finishes long before
+# numba could even load a cached kernel; only very long arrays are JIT-compiled
+_JIT_MIN_LEVELS = 100_000
+_decay_core_jit = None
+
+
+def _decay_core(acc_values) -> Tuple[float, float, float]:
+    """Accuracy sum, sum of consecutive drops and the largest positive drop (the cliff), in one loop."""
+    acc_sum = acc_values[0]
+    drop_sum = 0.0
+    max_cliff = 0.0
+    for i in range(1, len(acc_values)):
+        acc_sum += acc_values[i]
+        d = acc_values[i - 1] - acc_values[i]
+        drop_sum += d
+        if d > max_cliff:
+            max_cliff = d
+    return acc_sum, drop_sum, max_cliff
+
+
+def _decay_stats(acc_values: np.ndarray) -> Tuple[float, float, float]:
+    """
+    _decay_core over `acc_values`: as Python over a list for normal sweeps,
+    through an njit build for arrays of _JIT_MIN_LEVELS or more. numba is
+    optional and only imported the first time such an array turns up.
+    """
+    global _decay_core_jit
+    if acc_values.size >= _JIT_MIN_LEVELS:
+        if _decay_core_jit is None:
+            try:
+                from numba import njit
+            except ImportError:
+                _decay_core_jit = _decay_core
+            else:
+                _decay_core_jit = njit(cache=True, fastmath=True)(_decay_core)
+        return _decay_core_jit(acc_values)
+    return _decay_core(acc_values.tolist())
+
+
+def calculate_accuracies(results: List[Dict[str, Any]]) -> LevelAccuracies:
     """
     Calculates accuracy per complexity level (Ops count).
     """
-    logger = get_logger()
-    logger.info(f"--- [Step 3: Calculate Accuracy per Complexity Step] ---")
+    logger.info("--- [Step 3: Calculate Accuracy per Complexity Step] ---")
     
-    level_counts = {}
-    level_correct = {}
-
     if not results:
-         return {}
-
-    for res in results:
-         if 'level' not in res or 'is_correct' not in res:
-              continue
-         level = res['level']
-         is_correct = res['is_correct']
-         level_counts[level] = level_counts.get(level, 0) + 1
-         if is_correct:
-             level_correct[level] = level_correct.get(level, 0) + 1
-
-    accuracies = {}
-    sorted_levels = sorted(level_counts.keys())
-
-    for level in sorted_levels:
-        count = level_counts[level]
-        correct = level_correct.get(level, 0)
-        acc = (correct / count) if count > 0 else 0.0
-        logger.info(f"  Complexity {level} Ops: {acc*100:.2f}%  ({correct}/{count})")
-        accuracies[level] = acc
+         return _EMPTY_ACCURACIES
+
+    valid = [res for res in results if 'level' in res and 'is_correct' in res]
+
+    if len(valid) < _COUNTER_MAX_N:
+        # Small runs: Counter hashes in C with none of NumPy's per-array setup cost
+        level_counts = Counter(res['level'] for res in valid)
+        level_correct = Counter(res['level'] for res in valid if res['is_correct'])
+        measured = np.array(sorted(level_counts), dtype=np.int64)
+        counts = np.array([level_counts[level] for level in measured.tolist()], dtype=np.float64)
+        hits = np.array([level_correct[level] for level in measured.tolist()], dtype=np.float64)
+    else:
+        # fromiter streams straight into typed buffers; it is ~1.6x faster
+        # than np.array over a list of (level, is_correct) tuples
+        levels = np.fromiter((res['level'] for res in valid), dtype=np.int32, count=len(valid))
+        correct = np.fromiter((res['is_correct'] for res in valid), dtype=np.int8, count=len(valid))
+
+        # Count totals and hits per level in C instead of a per-result Python loop
+        level_counts = np.bincount(levels)
+        measured = np.flatnonzero(level_counts)
+        counts = level_counts[measured].astype(np.float64)
+        hits = np.bincount(levels, weights=correct)[measured]
+
+    if not measured.size:
+         return _EMPTY_ACCURACIES
+
+    accuracies = LevelAccuracies(measured, hits / counts)
+
+    if logger.isEnabledFor(logging.INFO):
+        lines = [
+            f"  Complexity {level} Ops: {acc*100:.2f}%  ({int(hit)}/{int(count)})"
+            for (level, acc), hit, count in zip(accuracies.items(), hits.tolist(), counts.tolist())
+        ]
+        logger.info("\n".join(lines))
 
     return accuracies
 
-def calculate_cds(accuracies: Dict[int, float]) -> float:
-    """
-    Calculates Old CDS and New Robust Score.
-    """
-    logger = get_logger()
-    logger.info(f"--- [Step 4: Calculate Decay Metrics] ---")
+def _decay_metrics(accuracies: LevelAccuracies) -> DecayMetrics:
+    logger.info("--- [Step 4: Calculate Decay Metrics] ---")
 
     if not accuracies:
-        return 0.0
+        return DecayMetrics(accuracies, 0.0, 0.0, 1.0, 0.0)
 
-    levels = sorted(accuracies.keys())
-    acc_values = [accuracies[l] for l in levels]
+    # Already dense and sorted by level; no dict re-scan needed
+    levels = accuracies.levels
+    acc_values = accuracies.accuracies
 
-    # Calculate Drops
-    drops = []
-    for i in range(len(levels) - 1):
-        d = acc_values[i] - acc_values[i+1]
-        drops.append(d)
-        if d > 0.4:
-            logger.warning(f" CLIFF DETECTED: {levels[i]}->{levels[i+1]} ops (-{d*100:.1f}%)")
+    # Mean, drop sum and cliff from a single traversal (positive drop = accuracy fell)
+    n_drops = acc_values.size - 1
+    acc_sum, drop_sum, max_cliff = _decay_stats(acc_values)
+    acc_sum, drop_sum, max_cliff = float(acc_sum), float(drop_sum), float(max_cliff)
 
     # Old CDS
-    avg_drop = np.mean(drops) if drops else 0.0
+    avg_drop = drop_sum / n_drops if n_drops else 0.0
     cds_score = 1.0 - avg_drop
 
     # Robust Score
-    valid_declines = [max(0, d) for d in drops]
-    max_cliff = max(valid_declines) if valid_declines else 0.0
-    perf_score = np.mean(acc_values)
-    robust_score = perf_score * max(0, 1.0 - max_cliff)
+    perf_score = acc_sum / acc_values.size
+    robust_score = perf_score * max(0.0, 1.0 - max_cliff)
 
-    logger.info(f"  Standard CDS: {cds_score:.4f}")
-    logger.info(f"  Robust Score: {robust_score:.4f}")
-    
-    return robust_score
\ No newline at end of file
+    if max_cliff > 0.4:
+        drops = -np.diff(acc_values)
+        logger.warning("\n".join(
+            f" CLIFF DETECTED: {levels[i]}->{levels[i+1]} ops (-{drops[i]*100:.1f}%)"
+            for i in np.flatnonzero(drops > 0.4)
+        ))
+
+    logger.info("  Standard CDS: %.4f\n  Robust Score: %.4f", cds_score, robust_score)
+
+    return DecayMetrics(accuracies, perf_score, max_cliff, cds_score, robust_score)
+
+def calculate_cds(accuracies: LevelAccuracies) -> float:
+    """
+    Calculates Old CDS and New Robust Score.
+    """
+    return _decay_metrics(accuracies).robust_score
+
+def compute_metrics(results: List[Dict[str, Any]]) -> DecayMetrics:
+    """
+    Steps 3 & 4 in one call: per-level accuracy, CDS and Robust Score.
+    """
+    return _decay_metrics(calculate_accuracies(results))
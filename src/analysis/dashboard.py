@@ -1,13 +1,30 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import io
 import json
+import mmap
 import os
-import glob
+import threading
 import time
 import plotly.graph_objects as go
 import plotly.express as px
-from sklearn.metrics import auc
+
+# orjson is optional: a faster line decoder for the fallback reader (accepts bytes)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# numba is optional: without it the KPI kernel runs as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
 
 # --- CONFIGURATION ---
 st.set_page_config(
@@ -46,28 +63,111 @@ RESULTS_DIR = os.path.join(PROJECT_ROOT, "data", "results")
 
 # --- HELPER FUNCTIONS ---
 
-@st.cache_data(ttl=2)  # Cache for 2 seconds to allow live updates without disk thrashing
-def load_data(filepath):
-    """Loads JSONL and returns raw DF + Aggregated Stats (if applicable)"""
-    if not filepath or not os.path.exists(filepath):
-        return None, None
-    
+def _file_mtime(filepath):
+    """Modification time used as a cache key, so unchanged files are not reparsed"""
+    try:
+        return os.path.getmtime(filepath)
+    except (TypeError, OSError):
+        return None
+
+def _read_jsonl_fallback(chunk):
+    """Line-by-line reader that skips malformed lines"""
     data = []
+    for line in chunk.splitlines():
+        try:
+            data.append(_json_loads(line))
+        except:
+            continue
+    return pd.DataFrame(data)
+
+def _parse_jsonl(chunk):
+    """Parses a block of complete JSONL lines (bytes) into a DataFrame"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    data.append(json.loads(line))
-                except:
-                    continue
-    except Exception as e:
+        # Parse in pandas' C reader; no type coercion beyond what JSON itself gives
+        return pd.read_json(io.BytesIO(chunk), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        return _read_jsonl_fallback(chunk)
+
+@st.cache_resource
+def _file_states():
+    """Per-file incremental parse state. Module globals are reset on every
+    Streamlit rerun, cache_resource objects are not."""
+    return {}, threading.Lock()
+
+def _new_file_state():
+    return {
+        'offset': 0,                          # bytes consumed so far
+        'df': pd.DataFrame(),                 # every row parsed so far
+        'counts': np.zeros(0, dtype=np.int64),   # rows per level (index = level)
+        'correct': np.zeros(0, dtype=np.int64),  # correct rows per level
+    }
+
+def _accumulate(state, new_df):
+    """Folds freshly parsed rows into the per-level count arrays"""
+    if 'level' not in new_df.columns or 'is_correct' not in new_df.columns:
+        return
+    rows = new_df[new_df['level'].notna() & new_df['is_correct'].notna()]
+    if rows.empty:
+        return
+    lv = rows['level'].to_numpy(dtype=np.int64)
+    hit = rows['is_correct'].to_numpy(dtype=np.int8)
+
+    # One C counting pass per array; sized to cover both old and new levels
+    size = max(int(lv.max()) + 1, state['counts'].size)
+    new_counts = np.bincount(lv, minlength=size)
+    new_correct = np.bincount(lv, weights=hit, minlength=size).astype(np.int64)
+
+    # Rebind instead of adding in place: a concurrent session may still be
+    # building its stats from the previous arrays outside the lock
+    old = state['counts'].size
+    new_counts[:old] += state['counts']
+    new_correct[:old] += state['correct']
+    state['counts'], state['correct'] = new_counts, new_correct
+
+@st.cache_data(ttl=2)  # Cache for 2 seconds to allow live updates without disk thrashing
+def load_data(filepath, mtime=None):
+    """Loads JSONL and returns raw DF + Aggregated Stats (if applicable).
+    Only bytes appended since the previous call are parsed and aggregated.
+    `mtime` is only part of the cache key; pass _file_mtime(filepath)."""
+    if not filepath or not os.path.exists(filepath):
         return None, None
 
-    if not data:
+    states, lock = _file_states()
+    with lock:
+        state = states.get(filepath)
+        chunk = b''
+        try:
+            with open(filepath, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if state is None or size < state['offset']:
+                    # First sight of this file, or it was truncated/replaced: start over
+                    state = states[filepath] = _new_file_state()
+                start = state['offset']
+                if size > start:  # (mmap cannot map an empty file)
+                    # Tail-scan the page-cache mapping; copy out only the new complete
+                    # lines, so a half-written tail is picked up on a later tick
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        end = mm.rfind(b'\n', start) + 1
+                        if end:
+                            chunk = mm[start:end]
+        except Exception as e:
+            return None, None
+
+        if chunk:
+            new_df = _parse_jsonl(chunk)
+            state['offset'] += len(chunk)
+            if not new_df.empty:
+                _accumulate(state, new_df)
+                state['df'] = pd.concat([state['df'], new_df], ignore_index=True) if len(state['df']) else new_df
+
+        # Shallow copy: callers add columns (ICCR status, etc.) per rerun and the
+        # cached state frame must not accumulate them
+        df = state['df'].copy(deep=False)
+        counts, correct = state['counts'], state['correct']
+
+    if df.empty:
         return None, None
 
-    df = pd.DataFrame(data)
-    
     # --- VALIDATION LOGIC (UPDATED) ---
     # Check for EITHER standard RAF keys OR ICCR keys
     is_raf = 'level' in df.columns
@@ -80,39 +180,70 @@ def load_data(filepath):
     if is_iccr and 'level' not in df.columns:
         df['level'] = 0
 
-    # Sort (only if level exists and is meaningful)
-    if 'level' in df.columns:
-        df = df.sort_values(by=['level'])
-    
+    # No sort: rows stay in run order. Per-level stats come out of the level-indexed
+    # arrays already ordered, and nothing downstream needs a level-sorted raw frame.
+
     # Aggregation (Only useful for RAF Curves)
     stats = None
     if is_raf:
-        stats = df.groupby('level')['is_correct'].agg(['mean', 'count', 'sum']).reset_index()
-        stats.columns = ['level', 'accuracy', 'count', 'correct_count']
+        # Derived from the running per-level arrays, not a groupby over every row
+        measured = np.flatnonzero(counts)
+        stats = pd.DataFrame({
+            'level': measured,
+            'accuracy': correct[measured] / counts[measured],
+            'count': counts[measured],
+            'correct_count': correct[measured],
+        })
     
     return df, stats
 
+def _kpi_core(x, y):
+    """One pass over the accuracy curve: trapezoidal AUC, max positive drop, robust score"""
+    n = y.shape[0]
+    area = 0.0
+    max_cliff = 0.0
+    for i in range(1, n):
+        area += (x[i] - x[i - 1]) * (y[i] + y[i - 1]) * 0.5
+        d = y[i - 1] - y[i]
+        if d > max_cliff:
+            max_cliff = d
+
+    # AUC Normalization
+    span = x[n - 1] - x[0]
+    perf_auc = area / span if span != 0 else 0.0
+    return perf_auc * (1.0 - max_cliff), max_cliff, y[n - 1]
+
+@st.cache_resource
+def _kpi_kernel():
+    """JIT-compiled _kpi_core, kept across Streamlit reruns so it compiles once per
+    server process. (numba's on-disk cache cannot serialise a Streamlit script.)"""
+    return njit(fastmath=True)(_kpi_core)
+
 def calculate_kpis(stats):
     """Calculates Robust Score (AUC) and Max Cliff (For RAF Mode)"""
     if stats is None or len(stats) < 2:
         return 0, 0, 0
 
-    x = stats['level'].values
-    y = stats['accuracy'].values
-    
-    # Drops
-    drops = [y[i] - y[i+1] for i in range(len(y)-1)]
-    max_cliff = max([max(0, d) for d in drops]) if drops else 0.0
-    
-    # AUC Normalization
-    if x[-1] - x[0] == 0:
-        perf_auc = 0.0
-    else:
-        perf_auc = auc(x, y) / (x[-1] - x[0])
-        
-    robust_score = perf_auc * (1.0 - max_cliff)
-    
-    return robust_score, max_cliff, y[-1] # Score, Cliff, Final Accuracy
+    x = stats['level'].to_numpy(dtype=np.float64)
+    y = stats['accuracy'].to_numpy(dtype=np.float64)
+    return _kpi_kernel()(x, y) # Score, Cliff, Final Accuracy
+
+@st.cache_data(ttl=5)
+def _scan_result_files(results_dir):
+    """Newest-first *.jsonl paths plus their sidebar labels, from one scandir pass.
+    Cached for 5s so the 2s auto-refresh does not re-stat every run file."""
+    try:
+        with os.scandir(results_dir) as it:
+            entries = [
+                (entry.stat().st_mtime, entry.path, entry.name) for entry in it
+                if entry.name.endswith(".jsonl") and not entry.name.startswith(".") and entry.is_file()
+            ]
+    except OSError:
+        return [], {}
+    entries.sort(reverse=True)
+    files = [path for _, path, _ in entries]
+    labels = {path: "📄 " + name for _, path, name in entries}
+    return files, labels
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -120,8 +251,7 @@ with st.sidebar:
     
     # File Scanner
     # We look for ANY .jsonl file in results (both RAF and ICCR runs)
-    result_files = glob.glob(os.path.join(RESULTS_DIR, "*.jsonl"))
-    result_files.sort(key=os.path.getmtime, reverse=True)
+    result_files, file_labels = _scan_result_files(RESULTS_DIR)
     
     if not result_files:
         st.error("No JSONL files found in `data/results/`")
@@ -131,14 +261,14 @@ with st.sidebar:
         "🔴 Live Run (Target)", 
         result_files, 
         index=0,
-        format_func=lambda x: "📄 " + os.path.basename(x)
+        format_func=file_labels.get
     )
     
     compare_file = st.selectbox(
         "🔵 Baseline (Optional)", 
         [None] + result_files, 
         index=0,
-        format_func=lambda x: "📄 " + os.path.basename(x) if x else "None"
+        format_func=lambda x: file_labels[x] if x else "None"
     )
     
     st.divider()
@@ -147,8 +277,8 @@ with st.sidebar:
     refresh_rate = st.slider("Refresh Rate (s)", 1, 10, 2)
 
 # --- MAIN DATA LOADING ---
-df_live, stats_live = load_data(selected_file)
-df_base, stats_base = load_data(compare_file) if compare_file else (None, None)
+df_live, stats_live = load_data(selected_file, _file_mtime(selected_file))
+df_base, stats_base = load_data(compare_file, _file_mtime(compare_file)) if compare_file else (None, None)
 
 if df_live is None:
     st.warning("Waiting for data stream to initialize...")
@@ -217,7 +347,7 @@ if DASHBOARD_MODE == "ICCR":
     with c1:
         # Bar Chart: DMS by Problem Type
         fig_bar = px.bar(
-            df_live.groupby('problem_type')[metric_key].mean().reset_index(),
+            avg_dms.reset_index(),
             x='problem_type',
             y=metric_key,
             color='problem_type',
@@ -386,18 +516,29 @@ else:
     st.subheader("🔍 Granular Success Matrix")
 
     if df_live is not None:
+        unique_levels, level_idx = np.unique(df_live['level'].to_numpy(), return_inverse=True)
+
         # Create a simulated "Question ID" if not present to make the matrix work
         if 'id' not in df_live.columns:
-            df_live['q_idx'] = df_live.groupby('level').cumcount()
+            # Running index within each level (cumcount) via a stable sort on level
+            order = np.argsort(level_idx, kind='stable')
+            group_start = np.searchsorted(level_idx[order], np.arange(unique_levels.size))
+            q_idx = np.empty(level_idx.size, dtype=np.int64)
+            q_idx[order] = np.arange(level_idx.size) - group_start[level_idx[order]]
         else:
-            df_live['q_idx'] = df_live['id']
+            q_idx = df_live['id'].to_numpy()
 
-        # Pivot: Index=Question Index, Columns=Level, Values=Correct(1)/Incorrect(0)
+        # Matrix: Row=Question Index, Column=Level, Value=Correct(1)/Incorrect(0), NaN=not run
         # We filter to show only the first 50 questions per level to avoid clutter if N is huge
-        df_matrix = df_live[df_live['q_idx'] < 50].pivot(index='q_idx', columns='level', values='is_correct')
-        
+        keep = (q_idx >= 0) & (q_idx < 50)
+        n_rows = int(q_idx[keep].max()) + 1 if keep.any() else 0
+        matrix = np.full((n_rows, unique_levels.size), np.nan, dtype=np.float32)
+        matrix[q_idx[keep].astype(np.int64), level_idx[keep]] = df_live['is_correct'].to_numpy(dtype=np.float32)[keep]
+
         fig_heat = px.imshow(
-            df_matrix,
+            matrix,
+            x=unique_levels,
+            y=np.arange(n_rows),
             labels=dict(x="Complexity Level", y="Sample Index", color="Correct"),
             color_continuous_scale=[[0, '#EF553B'], [1, '#00CC96']], # Red to Green
             title="Success/Fail Pattern (Green=Pass, Red=Fail)"
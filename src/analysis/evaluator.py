@@ -1,103 +1,142 @@
-import json
-import os
-import sys
+import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-
-from src.monitoring.logger import get_logger
 from src.monitoring.tracker import ResultTracker
+from src.utils import Benchmark, json_dumps
 from src.evaluation.groq_client import query_model
 #from src.evaluation.huggingface_client import query_model
 from src.evaluation.response_parser import parse_response
 
+logger = logging.getLogger(__name__)
+
+
+class _RateLimiter:
+    """
+    Token bucket shared across worker threads: one token per `interval`
+    seconds, at most `burst` banked, so starts average `interval` apart.
+    """
+
+    def __init__(self, interval: float, burst: int = 1):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.interval > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._last) / self.interval)
+            else:
+                self._tokens = float(self.burst)
+            self._last = now
+            # Take a token now; a negative balance is the queue of callers ahead of us
+            self._tokens -= 1.0
+            delay = -self._tokens * self.interval if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
 def run_evaluation(
-    benchmark: List[Dict[str, Any]], 
+    benchmark: Benchmark,
     tracker: ResultTracker,
     tolerance: float,
-    sleep_time: float
+    sleep_time: float,
+    concurrency: int = 1
 ) -> List[Dict[str, Any]]:
     """
     Steps 2 & 3 (part 1): Run evaluation loop.
-    Iterates all problems, calls the API, parses the response,
-    and logs the result.
+    Dispatches API calls for all problems on a bounded thread pool
+    (`concurrency` in flight, starts spaced `sleep_time` apart), then
+    parses and logs each response as it completes. The returned list is
+    in benchmark order.
     """
-    logger = get_logger() # Get logger instance
-    logger.info(f"--- [Step 2 & 3: Run Evaluation] ---")
-    results = []
-
-    for i, problem in enumerate(benchmark):
-        # Basic check for expected keys
-        if not all(k in problem for k in ['level', 'problem', 'answer']):
-            logger.warning(f"Skipping invalid problem entry at index {i}: Missing required keys. Data: {problem}")
-            continue
-
-        level = problem['level'] # Represents Complexity (Ops) now
-        problem_str = problem['problem']
-        ground_truth = problem['answer']
+    logger.info("--- [Step 2 & 3: Run Evaluation] ---")
+    results: List[Dict[str, Any]] = [None] * len(benchmark)
+
+    limiter = _RateLimiter(sleep_time)
+    stop = threading.Event()
+
+    def _fetch(prompt: str) -> Optional[Dict[str, Any]]:
+        limiter.wait()
+        # A worker may have slept in the limiter past an abort; don't start a new call
+        if stop.is_set():
+            return None
+        return query_model(prompt)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        # --- Step 2a: Call API (network latency overlaps across workers) ---
+        # Rows were validated at load time; unpack the parallel arrays once
+        levels = benchmark.levels.tolist()
+        problems = benchmark.problems
+        answers = benchmark.answers.tolist()
+        n_problems = len(problems)
+        futures = {pool.submit(_fetch, problem_str): i for i, problem_str in enumerate(problems)}
+
+        # Results are consumed here, on one thread, so the tracker has a single writer
+        for future in as_completed(futures):
+            i = futures[future]
+            level = levels[i] # Represents Complexity (Ops) now
+            problem_str = problems[i]
+            ground_truth = answers[i]
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Running problem %d/%d (Complexity: %d Ops)...", i + 1, n_problems, level)
+
+            # --- Set defaults for logging ---
+            model_answer = None
+            is_correct = False
+            raw_text_response = "N/A" # Default if API fails or format error
 
-        # Ensure ground_truth is a number
-        if not isinstance(ground_truth, (int, float)):
-             logger.warning(f"Skipping problem {i+1} due to non-numeric ground truth: {ground_truth}")
-             continue
-
-
-        logger.info(f"Running problem {i+1}/{len(benchmark)} (Complexity: {level} Ops)...")
-
-        # --- Set defaults for logging ---
-        model_answer = None
-        is_correct = False
-        raw_text_response = "N/A" # Default if API fails or format error
-
-        # --- Step 2a: Call API ---
-        prompt = problem_str
-        response_json = query_model(prompt)
-
-        if response_json is None:
-            logger.warning("  - API call failed.")
-        else:
             try:
-                # --- Step 2b: Parse Response ---
-                raw_text_response = response_json['choices'][0]['message']['content']
-                model_answer = parse_response(raw_text_response)
-
-                if model_answer is None:
-                    logger.warning(f"  - Parser failed to find a number in response: '{raw_text_response[:100]}...'")
-                else:
-                    # --- Step 3: Check Accuracy (for this one problem) ---
-                    # Ensure model_answer is also float for comparison
-                    if isinstance(model_answer, (int, float)):
-                        is_correct = abs(float(model_answer) - float(ground_truth)) < tolerance
-                        logger.info(f"  - Truth: {ground_truth}, Model: {model_answer}, Correct: {is_correct}")
+                response_json = future.result()
+            except Exception as api_e:
+                logger.error("  - API call raised: %s", api_e, exc_info=True)
+                response_json = None
+
+            if response_json is None:
+                logger.warning("  - API call failed.")
+            else:
+                try:
+                    # --- Step 2b: Parse Response ---
+                    raw_text_response = response_json['choices'][0]['message']['content']
+                    model_answer = parse_response(raw_text_response)
+
+                    if model_answer is None:
+                        logger.warning("  - Parser failed to find a number in response: '%s...'", raw_text_response[:100])
                     else:
-                        logger.warning(f"  - Parser returned non-numeric value: {model_answer}. Marking incorrect.")
-                        is_correct = False
+                        # --- Step 3: Check Accuracy (for this one problem) ---
+                        # parse_response returns a float and ground_truth was coerced at load
+                        is_correct = abs(model_answer - ground_truth) < tolerance
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("  - Truth: %s, Model: %s, Correct: %s", ground_truth, model_answer, is_correct)
 
+                except (KeyError, IndexError, TypeError) as e:
+                    logger.warning("  - API response format error: %s. Full response: %s", e, json_dumps(response_json))
+                    raw_text_response = f"Format Error: {e}"
 
-            except (KeyError, IndexError, TypeError) as e:
-                logger.warning(f"  - API response format error: {e}. Full response: {json.dumps(response_json)}")
-                raw_text_response = f"Format Error: {e}" 
-
-        try:
-            tracker.log_result(
-                level=level,
-                problem=problem_str,
-                ground_truth=float(ground_truth), # Ensure float
-                model_answer=float(model_answer) if model_answer is not None else None, # Ensure float or None
-                is_correct=is_correct,
-                raw_response=raw_text_response 
-            )
-        except Exception as track_e:
-             logger.error(f"Failed to log result for problem {i+1} to tracker: {track_e}", exc_info=True)
-
-
-        
-        logger.debug(f"Sleeping for {sleep_time} seconds...")
-        time.sleep(sleep_time)
-
-    
-        results.append({'level': level, 'is_correct': is_correct})
+            try:
+                tracker.log_result(
+                    level=level,
+                    problem=problem_str,
+                    ground_truth=ground_truth,
+                    model_answer=model_answer,
+                    is_correct=is_correct,
+                    raw_response=raw_text_response
+                )
+            except Exception as track_e:
+                 logger.error("Failed to log result for problem %d to tracker: %s", i + 1, track_e, exc_info=True)
+
+            results[i] = {'level': level, 'is_correct': is_correct}
+    finally:
+        # On an error or Ctrl-C, drop the queued calls instead of draining them
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
 
     logger.info("--- [Evaluation Complete] ---")
-    return results
\ No newline at end of file
+    return results
@@ -1,11 +1,11 @@
 # src/analysis/reporting.py
 
 import os
-from typing import Dict
 from src.monitoring.logger import get_logger
+from src.analysis.calculator import LevelAccuracies
 
 def log_final_report(
-    accuracies: Dict[int, float], 
+    accuracies: LevelAccuracies, 
     cds_score: float, 
     results_filename: str, 
     benchmark_filename: str
@@ -19,18 +19,13 @@ def log_final_report(
     logger.info(f"Results file: {results_filename}")
     logger.info(f"Benchmark file used: {benchmark_filename}")
     logger.info("="*30)
-    logger.info("\nPer-Level Accuracy:")
 
     if accuracies:
-        all_levels = sorted(accuracies.keys())
-        if all_levels:
-            min_l, max_l = min(all_levels), max(all_levels)
-            for level in range(min_l, max_l + 1):
-                 acc = accuracies.get(level, 0.0)
-                 logger.info(f"  Level {level}: {acc*100:.2f}%")
-        else:
-            logger.warning("Accuracy dictionary was empty.")
+        # One emission (one handler lock round-trip) for the whole table
+        lines = [f"  Level {level}: {acc*100:.2f}%" for level, acc in accuracies.items()]
+        logger.info("\nPer-Level Accuracy:\n" + "\n".join(lines))
     else:
+        logger.info("\nPer-Level Accuracy:")
         logger.warning("No accuracy results to report.")
 
     if isinstance(cds_score, float):
@@ -10,6 +10,7 @@ RESULTS_DIR = os.path.join(PROJECT_ROOT, "data", "results")
 # --- Evaluation Params ---
 TOLERANCE = 0.01
 SLEEP_TIME = 2
+CONCURRENCY = 4  # API calls in flight; starts are still spaced SLEEP_TIME apart
 
 OPERAND_MIN = 1
 OPERAND_MAX = 10
@@ -0,0 +1,13 @@
+import os
+
+
+def require_api_key(env_var: str, hint: str = "") -> str:
+    """
+    Returns the API key stored in `env_var`, raising RuntimeError if it is unset.
+    Clients call this when they build their connection on first use, not at
+    import, so modules that only import a client need no keys.
+    """
+    key = os.getenv(env_var)
+    if not key:
+        raise RuntimeError(f"{env_var} not found in environment variables (.env). {hint}".rstrip())
+    return key
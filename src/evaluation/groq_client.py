@@ -1,120 +1,88 @@
-"""import os
+import logging
 import time
+from functools import lru_cache
 from openai import OpenAI
 from dotenv import load_dotenv
-from typing import Optional, Dict, Any
-import sys
+from typing import List, Dict, Optional, Any
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.evaluation.api_keys import require_api_key
 
-from src.monitoring.logger import get_logger
-logger = get_logger()
-
-BASE_URL = "https://api.groq.com/openai/v1"
-MODEL_NAME = "openai/gpt-oss-20b" 
+logger = logging.getLogger(__name__)
 
+# Load env vars
 load_dotenv()
 
-def query_model(prompt: str) -> Optional[Dict[str, Any]]:
-    
-    Queries the model using the OpenAI client pointing to Groq.
-    Returns a dict structure compatible with the existing evaluator.
-    
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        logger.error("GROQ_API_KEY not found in environment variables.")
-        return None
+# --- MODEL SELECTION ---
+# Dev/Debug: "llama-3.1-8b-instant" (Fast, High Limits)
+# Production: "llama-3.3-70b-versatile" (Smart, Low Limits)
+MODEL_NAME = "llama-3.3-70b-versatile" 
+RAF_MODEL_NAME = "openai/gpt-oss-20b"
 
-    
-    client = OpenAI(
-        base_url=BASE_URL,
-        api_key=api_key,
+@lru_cache(maxsize=None)
+def _client() -> OpenAI:
+    """
+    One client for the whole process, built on first use: its HTTP connection
+    pool keeps the TLS session alive across calls and is safe to share between
+    threads. The SDK retries 429/5xx itself with exponential backoff (and Retry-After).
+    """
+    return OpenAI(
+        base_url="https://api.groq.com/openai/v1",
+        api_key=require_api_key("GROQ_API_KEY"),
+        max_retries=3,
     )
 
+def query_model(prompt: str) -> Optional[Dict[str, Any]]:
+    """
+    Queries the model using the OpenAI client pointing to Groq.
+    Returns a dict structure compatible with the existing evaluator.
+    """
+    client = _client()  # A missing key raises here rather than being logged per call
     try:
         completion = client.chat.completions.create(
-            model=MODEL_NAME,
-          messages = [
-            {
-                "role": "system",
-                "content": "You are a precise calculator. Output ONLY the result."
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Calculate: {prompt}\n\n"
-                    "Rules:\n"
-                    "1. Do NOT explain your steps.\n"
-                    "2. Do NOT use <think> tags.\n"
-                    "3. Output format must be strictly: FINAL_ANSWER: <number>"
-                )
-            }
-        ],
+            model=RAF_MODEL_NAME,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a precise calculator. Output ONLY the result."
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"Calculate: {prompt}\n\n"
+                        "Rules:\n"
+                        "1. Do NOT explain your steps.\n"
+                        "2. Do NOT use <think> tags.\n"
+                        "3. Output format must be strictly: FINAL_ANSWER: <number>"
+                    )
+                }
+            ],
             temperature=0.0,
             max_tokens=1024,
         )
 
-        # Extract content
-        response_content = completion.choices[0].message.content
-        
         # Return in the structure expected by src/analysis/evaluator.py
         return {
             'choices': [
                 {
                     'message': {
-                        'content': response_content
+                        'content': completion.choices[0].message.content
                     }
                 }
             ]
         }
 
     except Exception as e:
-        # Handle Rate Limits (429) specifically
-        if "429" in str(e):
-            logger.warning("Groq Rate Limit hit (429). Sleeping for 10s...")
-            time.sleep(10)
-            return None 
-            
+        # Rate limits (429) only land here once the client's own retries are spent
         logger.error(f"Groq API Request Error: {e}", exc_info=True)
         return None
 
-if __name__ == "__main__":
-    # Quick Test
-    test_q = "((2+2)*5)/4"
-    print(f"Testing with query: {test_q}")
-    result = query_model(test_q)
-    print("Result:", result)"""
-    
-import os
-import time
-from openai import OpenAI
-from dotenv import load_dotenv
-from typing import List, Dict, Optional
-import sys
-
-# Load env vars
-load_dotenv()
-
-# --- MODEL SELECTION ---
-# Dev/Debug: "llama-3.1-8b-instant" (Fast, High Limits)
-# Production: "llama-3.3-70b-versatile" (Smart, Low Limits)
-MODEL_NAME = "llama-3.3-70b-versatile" 
-
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key=os.getenv("GROQ_API_KEY"),
-)
-
 def query_agent(messages: List[Dict[str, str]]) -> Optional[str]:
     """
     Stateful query for Multi-Turn ICCR loop.
     Args:
         messages: Full conversation history [{"role": "...", "content": "..."}]
     """
-    if not os.getenv("GROQ_API_KEY"):
-        print("❌ ERROR: GROQ_API_KEY not found in .env")
-        return None
-
+    client = _client()
     try:
         completion = client.chat.completions.create(
             model=MODEL_NAME,
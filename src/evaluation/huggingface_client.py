@@ -1,13 +1,14 @@
-import os
+import logging
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from typing import Optional, Dict, Any
-import sys
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.evaluation.api_keys import require_api_key
 
-from src.monitoring.logger import get_logger # Import the function
-logger = get_logger() # Get the logger instance
+logger = logging.getLogger(__name__)
 
 
 MODEL_NAME = "Qwen/Qwen3-32B:groq" 
@@ -15,18 +16,30 @@ API_URL = "https://router.huggingface.co/v1/chat/completions"
 
 load_dotenv()
 
-def query_model(prompt: str) -> Optional[Dict[str, Any]]:
-    api_key = os.getenv("HF_API_KEY")
-    if not api_key:
-        logger.error("HF_API_KEY not found in environment variables.")
-        logger.error("Please create a .env file in the project root with HF_API_KEY=hf_...")
-        return None
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
+# One pooled session for every call: TCP/TLS setup is paid once per pooled
+# connection, not per request. Rate limits and transient 5xx are retried
+# here with exponential backoff (honouring Retry-After); POST is opted in
+# because a repeated completion request is harmless.
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False,  # hand the last response to raise_for_status()
+)
+
+@lru_cache(maxsize=None)
+def _session() -> requests.Session:
+    """The shared session, built (and the key checked) on first use."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_RETRY))
+    session.headers.update({
+        "Authorization": f"Bearer {require_api_key('HF_API_KEY', 'Please create a .env file in the project root with HF_API_KEY=hf_...')}",
         "Content-Type": "application/json"
-    }
+    })
+    return session
 
+def query_model(prompt: str) -> Optional[Dict[str, Any]]:
     payload = {
         "model": MODEL_NAME,
         "messages": [
@@ -43,9 +56,10 @@ def query_model(prompt: str) -> Optional[Dict[str, Any]]:
         "max_tokens": 1000   
     }
 
+    session = _session()  # A missing key raises here rather than being logged per call
     try:
         logger.debug(f"Sending API request to {API_URL} for model {MODEL_NAME}")
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=30)
+        response = session.post(API_URL, json=payload, timeout=30)
         response.raise_for_status() # Raises HTTPError for bad responses (4xx or 5xx)
         logger.debug("API request successful.")
         return response.json()
@@ -72,13 +86,8 @@ def query_model(prompt: str) -> Optional[Dict[str, Any]]:
 
 if __name__ == "__main__":
 
-    
-    try:
-        from src.evaluation.response_parser import parse_response
-    except ImportError:
-         # If run directly, src might not be in path correctly, adjust for test
-         sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-         from src.evaluation.response_parser import parse_response
+    # Run from the project root: python -m src.evaluation.huggingface_client
+    from src.evaluation.response_parser import parse_response
 
 
     logger.info("--- [HF Client & Parser Integration Self-Test] ---")
@@ -1,11 +1,46 @@
 import re
 from typing import Optional
 
+# The priority patterns stay on stdlib re. google-re2 scans them faster, but
+# its \s and \d are ASCII-only, so Unicode spaces (e.g. "FINAL_ANSWER:\xa042")
+# and digits in model output would parse differently.
+
+# Priorities 1-4 fused into one alternation, so a single left-to-right pass
+# finds every marker. Alternatives (named groups):
+# 1. `FINAL_ANSWER: <num> / <den>`  (num, den)  fraction
+# 2. `FINAL_ANSWER: <final>`        (final)     float/int
+# 3. `Answer: <ans>`                (ans)
+# 4. `= <eq>` at the end of a line  (eq)
+# A leftmost match is not a priority match (an early "= 3" must not beat a
+# later FINAL_ANSWER), so parse_response keeps the first hit of each kind and
+# applies the priority order itself. (?i) only affects 1-3, (?m) only 4.
+_MARKER_RE = re.compile(
+    r"(?im)"
+    r"FINAL_ANSWER:\s*(?P<num>[-+]?\d*\.?\d+)\s*/\s*(?P<den>[-+]?\d*\.?\d+)"  # Priority 1 (Fraction)
+    r"|FINAL_ANSWER:\s*(?P<final>[-+]?\d*\.?\d+)"                                # Priority 2 (Float/Int)
+    r"|Answer:\s*(?P<ans>[-+]?\d*\.?\d+)"                                        # Priority 3
+    r"|=\s*(?P<eq>[-+]?\d*\.?\d+)\s*$"                                          # Priority 4
+)
+
+# Priority 5: any signed int/decimal; the last one in the text is the fallback answer.
+_NUM_RE = re.compile(r"[-+]?\d*\.?\d+")
+
+# Answers sit near the end, so the fallback scans this many trailing chars first
+_TAIL_WINDOW = 256
+
+
+def _last_number(text: str, start: int = 0) -> Optional[re.Match]:
+    last = None
+    for last in _NUM_RE.finditer(text, start):
+        pass
+    return last
+
+
 def parse_response(raw_text: str) -> Optional[float]:
     """
     Parses the raw text response from a model to find a numeric answer.
 
-    It tries a "waterfall" of regex patterns in order of priority:
+    It applies a "waterfall" of patterns in order of priority:
     1. FINAL_ANSWER: <fraction> (e.g., "FINAL_ANSWER: 41/9")
     2. FINAL_ANSWER: <number> (e.g., "FINAL_ANSWER: 4.55")
     3. Answer: <number> (e.g., "Answer: 20")
@@ -15,60 +50,48 @@ def parse_response(raw_text: str) -> Optional[float]:
     if not raw_text:
         return None
 
-    # Priority 1 & 2: Look for "FINAL_ANSWER:" with support for fractions
-    # This regex has two parts, separated by '|':
-    # Part 1: `FINAL_ANSWER:\s*([-+]?\d*\.?\d+)\s*/\s*([-+]?\d*\.?\d+)`
-    #   - Looks for "FINAL_ANSWER:", whitespace,
-    #   - then captures a number (group 1, numerator),
-    #   - then a "/", then captures another number (group 2, denominator).
-    # Part 2: `FINAL_ANSWER:\s*([-+]?\d*\.?\d+)`
-    #   - Looks for "FINAL_ANSWER:", whitespace,
-    #   - then captures a single number (group 3).
-    fraction_or_float_regex = (
-        r"FINAL_ANSWER:\s*([-+]?\d*\.?\d+)\s*/\s*([-+]?\d*\.?\d+)"  # Priority 1 (Fraction)
-        r"|"
-        r"FINAL_ANSWER:\s*([-+]?\d*\.?\d+)"  # Priority 2 (Float/Int)
-    )
-    
-    match = re.search(fraction_or_float_regex, raw_text, re.IGNORECASE)
-    if match:
-        if match.group(1) and match.group(2):  # Part 1 (Fraction) was matched
-            try:
-                numerator = float(match.group(1))
-                denominator = float(match.group(2))
-                if denominator == 0:
-                    return None # Avoid division by zero
-                return numerator / denominator
-            except (ValueError, ZeroDivisionError):
-                pass  # Fall through to other patterns if conversion fails
-        
-        elif match.group(3):  # Part 2 (Float/Int) was matched
-            try:
-                return float(match.group(3))
-            except ValueError:
-                pass  # Fall through
+    answer = eq = None
+    # Every marker contains ':' or '='. The markers match case-insensitively,
+    # so these two literal checks are the cheapest exact rejection test.
+    has_marker = ':' in raw_text or '=' in raw_text
+    for match in (_MARKER_RE.finditer(raw_text) if has_marker else ()):
+        # Priority 1 & 2: the first FINAL_ANSWER wins outright
+        if match.group('num') is not None:
+            numerator = float(match.group('num'))
+            denominator = float(match.group('den'))
+            if denominator == 0:
+                return None # Avoid division by zero
+            return numerator / denominator
+        if match.group('final') is not None:
+            return float(match.group('final'))
+        # Priority 3 & 4: remember the first of each, keep looking for FINAL_ANSWER
+        if match.group('ans') is not None:
+            if answer is None:
+                answer = match.group('ans')
+        elif eq is None:
+            eq = match.group('eq')
 
     # Priority 3: "Answer: X" pattern (Old Priority 1)
-    match = re.search(r"Answer:\s*([-+]?\d*\.?\d+)", raw_text, re.IGNORECASE)
-    if match:
-        try:
-            return float(match.group(1))
-        except ValueError:
-            pass
+    if answer is not None:
+        return float(answer)
 
-    # Priority 4: Last "= X" at end of line (Old Priority 2)
-    match = re.search(r"=\s*([-+]?\d*\.?\d+)\s*$", raw_text, re.MULTILINE)
-    if match:
-        try:
-            return float(match.group(1))
-        except ValueError:
-            pass
+    # Priority 4: "= X" at end of line (Old Priority 2)
+    if eq is not None:
+        return float(eq)
 
     # Priority 5: Last number (fallback) (Old Priority 3)
-    numbers = re.findall(r"[-+]?\d*\.?\d+", raw_text)
-    if numbers:
+    # Keep only the last match instead of materialising a list of every number,
+    # and try the tail first. The window start is moved back out of any run of
+    # number characters, so the tail is split into the same tokens as a full scan.
+    tail_start = max(0, len(raw_text) - _TAIL_WINDOW)
+    while tail_start > 0 and (raw_text[tail_start - 1] in "+-." or raw_text[tail_start - 1].isdecimal()):
+        tail_start -= 1
+    last_number = _last_number(raw_text, tail_start)
+    if last_number is None and tail_start > 0:
+        last_number = _last_number(raw_text)
+    if last_number is not None:
         try:
-            return float(numbers[-1])
+            return float(last_number.group(0))
         except ValueError:
             pass
 
@@ -1,6 +1,9 @@
 import random
 import operator
-from typing import Tuple, Union, Callable
+from functools import lru_cache
+from typing import List, Optional, Tuple, Callable
+
+import numpy as np
 
 OPERATORS: list[Tuple[str, Callable]] = [
     ("+", operator.add),
@@ -9,69 +12,150 @@ OPERATORS: list[Tuple[str, Callable]] = [
     ("/", operator.truediv),
 ]
 
+# Flat postfix form used by generate_problem: parallel int8 opcode and
+# float64 operand arrays. Opcodes 0..3 index _OP_STRS and _OP_FUNCS; a _LEAF
+# slot pushes its operand.
+_LEAF = -1
+_OP_STRS: Tuple[str, ...] = tuple(s for s, _ in OPERATORS)
+_OP_FUNCS: Tuple[Callable, ...] = tuple(f for _, f in OPERATORS)
+_DIV = _OP_STRS.index("/")
+_MUL = _OP_STRS.index("*")
+
 OPERAND_MIN = 1
 OPERAND_MAX = 10
 
-
-def _get_random_operand() -> int:
-    return random.randint(OPERAND_MIN, OPERAND_MAX)
+# Private generators: skip the module-level random.* indirection on every draw
+_rng = random.Random()
+_np_rng = np.random.default_rng()
 
 
-def _build_expression(current_depth: int, max_depth: int) -> Union[int, tuple]:
+def seed_generators(seed: Optional[int] = None):
     """
-    Recursively builds an expression tree.
-    - If we've reached max_depth, return a leaf (number)
-    - Otherwise, create a binary operation with two sub-expressions
+    Reseed the module's generators (from OS entropy when `seed` is None).
+    Forked worker processes inherit the parent's generator state, so each
+    must call this before generating or they all produce the same problems.
     """
-    if current_depth >= max_depth:
-        return _get_random_operand()
-
-    op_str, op_func = random.choice(OPERATORS)
-
-    left = _build_expression(current_depth + 1, max_depth)
-    right = _build_expression(current_depth + 1, max_depth)
-
-    # Avoid division by zero
-    if op_str == "/":
-        right_val = _evaluate_expression(right)
-        retries = 0
-        while abs(right_val) < 1e-9 and retries < 100:
-            right = _build_expression(current_depth + 1, max_depth)
-            right_val = _evaluate_expression(right)
-            retries += 1
-        if retries >= 100:
-            op_str, op_func = ("*", operator.mul)
-
-    return (left, op_func, right)
-
-
-def _format_expression_str(expression: Union[int, tuple]) -> str:
-    """Format the expression tree as a string with parentheses."""
-    if isinstance(expression, int):
-        return str(expression)
-
-    left, op_func, right = expression
-    
-    # Find the string for the operator function
-    op_str = [s for s, f in OPERATORS if f == op_func][0]
-
-    left_str = _format_expression_str(left)
-    right_str = _format_expression_str(right)
+    global _np_rng
+    _rng.seed(seed)
+    _np_rng = np.random.default_rng(seed)
 
-    return f"({left_str} {op_str} {right_str})"
 
+def _get_random_operand() -> int:
+    return _rng.randint(OPERAND_MIN, OPERAND_MAX)
 
-def _evaluate_expression(expression: Union[int, tuple]) -> float:
-    """Recursively evaluate the expression tree."""
-    if isinstance(expression, int):
-        return float(expression)
-
-    left, op_func, right = expression
 
-    left_val = _evaluate_expression(left)
-    right_val = _evaluate_expression(right)
+@lru_cache(maxsize=None)
+def _postfix_template(depth: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Shape of the complete tree of `depth` in postfix order, shared by every
+    problem at that depth: (heights, op_slots, leaf_slots).
+    heights[i] is the height of the subtree rooted at slot i, 0 for a leaf.
+    A tree of height h is two trees of height h-1 followed by its operator,
+    so the node at slot i with height h has its right child in the
+    (2**h - 1) slots just before i and its left child in the ones before that.
+    The arrays are read-only; only operators and operands vary per problem.
+    """
+    heights = [0]
+    for h in range(1, depth + 1):
+        heights = heights + heights + [h]
+    heights = np.array(heights, dtype=np.int8)
+    op_slots = np.flatnonzero(heights)
+    leaf_slots = np.flatnonzero(heights == 0)
+    for arr in (heights, op_slots, leaf_slots):
+        arr.flags.writeable = False
+    return heights, op_slots, leaf_slots
+
+
+def _eval_postfix(opcodes: List[int], operands: List[float]) -> Tuple[float, int]:
+    """
+    Evaluate postfix opcode/operand lists with a value stack.
+    Returns (value, -1), or (0.0, i) if the division at slot i has a right
+    operand too close to zero.
+    """
+    stack: List[float] = []
+    push, pop = stack.append, stack.pop
+    for i, (op, operand) in enumerate(zip(opcodes, operands)):
+        if op == _LEAF:
+            push(operand)
+            continue
+        right = pop()
+        left = pop()
+        if op == _DIV and abs(right) < 1e-9:
+            return 0.0, i
+        push(_OP_FUNCS[op](left, right))
+    return stack[0], -1
+
+
+def postfix_buffers(max_depth: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Allocate (opcode_buf, operand_buf) big enough for generate_problem at any depth <= max_depth."""
+    n = (1 << (max_depth + 1)) - 1
+    return np.empty(n, dtype=np.int8), np.empty(n, dtype=np.float64)
+
+
+def _build_expression(
+    depth: int,
+    opcode_buf: Optional[np.ndarray] = None,
+    operand_buf: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Builds a random complete expression tree of `depth` in postfix form.
+    - Slots at height 0 are leaves (numbers)
+    - Every other slot is a binary operation over the two sub-expressions before it
+    Returns (opcodes, operands, value). When buffers are given, opcodes and
+    operands are views of their prefixes and nothing is allocated.
+    """
+    heights, op_slots, leaf_slots = _postfix_template(depth)
+    n = len(heights)
+    if opcode_buf is None or operand_buf is None:
+        opcode_buf, operand_buf = postfix_buffers(depth)
+    elif len(opcode_buf) < n or len(operand_buf) < n:
+        raise ValueError(f"Buffers hold {min(len(opcode_buf), len(operand_buf))} slots, depth {depth} needs {n}")
+    opcodes = opcode_buf[:n]
+    operands = operand_buf[:n]
+    opcodes.fill(_LEAF)
+    operands.fill(0.0)
+    opcodes[op_slots] = _np_rng.integers(0, len(_OP_STRS), len(op_slots))
+    operands[leaf_slots] = _np_rng.integers(OPERAND_MIN, OPERAND_MAX + 1, len(leaf_slots))
+
+    while True:
+        value, bad = _eval_postfix(opcodes.tolist(), operands.tolist())
+        if bad < 0:
+            return opcodes, operands, float(value)
+        _fix_division(heights, leaf_slots, opcodes, operands, bad)
+
+
+def _fix_division(heights: np.ndarray, leaf_slots: np.ndarray, opcodes: np.ndarray, operands: np.ndarray, bad: int):
+    """
+    Avoid division by zero at slot `bad`: operands are never 0, so a zero
+    divisor comes from cancellation inside the right child. Resample one of
+    its leaves at a time, re-evaluating only the right child's slots, rather
+    than redrawing the whole subtree and the tree around it.
+    """
+    start = bad - ((1 << int(heights[bad])) - 1)
+    lo, hi = np.searchsorted(leaf_slots, (start, bad))
+    right_leaves = leaf_slots[lo:hi].tolist()
+    right_ops, right_operands = opcodes[start:bad].tolist(), operands[start:bad].tolist()
+    for _ in range(100):
+        leaf = _rng.choice(right_leaves)
+        operands[leaf] = right_operands[leaf - start] = _get_random_operand()
+        right_val, inner_bad = _eval_postfix(right_ops, right_operands)
+        if inner_bad < 0 and abs(right_val) >= 1e-9:
+            return
+    opcodes[bad] = _MUL
+
+
+def _format_postfix(opcodes: np.ndarray, operands: np.ndarray) -> str:
+    """Format postfix arrays as a fully parenthesised infix string."""
+    stack: List[str] = []
+    push, pop = stack.append, stack.pop
+    for op_code, operand in zip(opcodes.tolist(), operands.astype(np.int64).tolist()):
+        if op_code == _LEAF:
+            push(str(operand))
+        else:
+            right = pop()
+            push(f"({pop()} {_OP_STRS[op_code]} {right})")
+    return stack[0]
 
-    return op_func(left_val, right_val)
 
 def generate_problem_by_ops(target_ops: int) -> Tuple[str, float]:
     """
@@ -84,48 +168,49 @@ def generate_problem_by_ops(target_ops: int) -> Tuple[str, float]:
         val = _get_random_operand()
         return str(val), float(val)
 
-    # Recursive helper to build a tree with exactly n operators
+    # Recursive helper to build a tree with exactly n operators.
+    # Renders as it builds: returns (expr_str, value), so each node is
+    # visited once and no intermediate tree is kept.
     def _build_n_op_tree(n):
         if n == 0:
-            return _get_random_operand()
+            operand = _get_random_operand()
+            return str(operand), float(operand)
         
         # We use 1 op for the current node. 
         # Remaining (n-1) ops are split randomly between left and right children.
         remaining = n - 1
-        left_ops = random.randint(0, remaining)
+        left_ops = _rng.randint(0, remaining)
         right_ops = remaining - left_ops
         
-        op_str, op_func = random.choice(OPERATORS)
+        op_str, op_func = _rng.choice(OPERATORS)
         
-        left_expr = _build_n_op_tree(left_ops)
-        right_expr = _build_n_op_tree(right_ops)
+        left_expr, left_val = _build_n_op_tree(left_ops)
+        right_expr, right_val = _build_n_op_tree(right_ops)
         
         # Avoid division by zero / tiny numbers
         if op_str == "/":
-            right_val = _evaluate_expression(right_expr)
             retries = 0
             while abs(right_val) < 1e-9 and retries < 20:
                 # Regenerate right branch
-                right_expr = _build_n_op_tree(right_ops)
-                right_val = _evaluate_expression(right_expr)
+                right_expr, right_val = _build_n_op_tree(right_ops)
                 retries += 1
             if retries >= 20:
                 op_str, op_func = ("*", operator.mul)
         
-        return (left_expr, op_func, right_expr)
+        return f"({left_expr} {op_str} {right_expr})", op_func(left_val, right_val)
 
-    expr_tree = _build_n_op_tree(target_ops)
-    
-    problem_str = _format_expression_str(expr_tree)
-    correct_answer = _evaluate_expression(expr_tree)
+    problem_str, correct_answer = _build_n_op_tree(target_ops)
     
-    # Format answer
-    if not correct_answer.is_integer():
-        correct_answer = round(correct_answer, 4)
+    # Format answer (integral values are unchanged by round)
+    correct_answer = round(correct_answer, 4)
 
     return problem_str, correct_answer
 
-def generate_problem(depth: int) -> Tuple[str, float]:
+def generate_problem(
+    depth: int,
+    opcode_buf: Optional[np.ndarray] = None,
+    operand_buf: Optional[np.ndarray] = None
+) -> Tuple[str, float]:
     """
     Generate a problem at the specified depth level.
     
@@ -134,19 +219,20 @@ def generate_problem(depth: int) -> Tuple[str, float]:
     - Depth 1: Nested once like ((2 + 3) * 4)
     - Depth 2: Nested twice like (((2 + 3) * 4) / 2)
     - And so on...
+
+    Callers generating many problems can pass buffers from
+    postfix_buffers(max_depth) to reuse them across calls.
     """
     if depth < 0:
         raise ValueError("Depth cannot be negative")
 
     # Build expression tree starting from depth 0 up to the target depth
-    expr_tuple = _build_expression(current_depth=0, max_depth=depth)
+    opcodes, operands, correct_answer = _build_expression(depth, opcode_buf, operand_buf)
 
-    problem_str = _format_expression_str(expr_tuple)
-    correct_answer = _evaluate_expression(expr_tuple)
+    problem_str = _format_postfix(opcodes, operands)
 
-    # Format answer to a reasonable precision
-    if not correct_answer.is_integer():
-        correct_answer = round(correct_answer, 4)
+    # Format answer to a reasonable precision (integral values are unchanged by round)
+    correct_answer = round(correct_answer, 4)
 
     return problem_str, correct_answer
 
@@ -154,10 +240,11 @@ def generate_problem(depth: int) -> Tuple[str, float]:
 if __name__ == "__main__":
     print("--- Problem Generator Self-Test ---\n")
     
+    opcode_buf, operand_buf = postfix_buffers(5)
     for d in range(6):
         print(f"Depth {d} examples:")
         for i in range(3):
-            problem, answer = generate_problem(d)
+            problem, answer = generate_problem(d, opcode_buf, operand_buf)
             print(f"  {i+1}. {problem} = {answer}")
         print()
     
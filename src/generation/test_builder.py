@@ -1,23 +1,70 @@
-import json
+import logging
+import math
 import os
-import sys
+import string
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import Iterable, List, Optional, Union
 
-# Ensure project root is in path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-
+from src.config import PROJECT_ROOT, BENCHMARK_DIR
 from src.monitoring.logger import get_logger, get_run_timestamp
+from src.utils import json_dumps_line, write_lines
 # Import the new linear generator function
-from src.generation.problem_generator import generate_problem_by_ops
+from src.generation.problem_generator import generate_problem_by_ops, seed_generators
+
+# Project paths are resolved once in src.config; load_benchmark reads the same directory
+OUTPUT_DIR = BENCHMARK_DIR
+
+WRITE_BATCH = 1024  # records buffered in memory per write
+MAP_CHUNKSIZE = 32  # problems sent to a worker per IPC round trip
+MAX_TOP_UPS = 3  # regeneration rounds for a level that came back short
 
-logger = get_logger()
+# One entry dict per worker process, reused for every problem it serialises.
+# We use 'level' to store the Op Count so downstream tools (evaluator)
+# don't need to change their variable names yet.
+_data_entry = {
+    "level": 0,  # Represents Complexity (Num Ops)
+    "problem": "",
+    "answer": 0.0
+}
 
-# Define Project Paths
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "test_sets")
+# Every character the generator emits; none of them needs escaping in a JSON string
+_SAFE = frozenset(string.digits + " +-*/().")
 
-def build_test_set(max_ops: int, problems_per_level: int, step_size: int = 2):
+def _generate_entry(current_ops: int) -> Union[bytes, str]:
+    """
+    Generates one problem as a newline-terminated JSON line.
+    Runs in a worker process; if generation fails it returns the error
+    message (a str) instead, so the parent can log why and top the level up.
+    """
+    # Call the NEW linear generator
+    try:
+        problem_str, correct_answer = generate_problem_by_ops(current_ops)
+    except ValueError as ve:
+        return str(ve)
+
+    # Fast path for the fixed schema: a safe problem string and a finite float
+    # (repr round-trips and is valid JSON) need no general serialiser
+    if _SAFE.issuperset(problem_str) and math.isfinite(correct_answer):
+        return f'{{"level":{current_ops},"problem":"{problem_str}","answer":{correct_answer!r}}}\n'.encode()
+
+    _data_entry["level"] = current_ops
+    _data_entry["problem"] = problem_str
+    _data_entry["answer"] = correct_answer
+    return json_dumps_line(_data_entry)
+
+def _collect(results: Iterable[Union[bytes, str]], current_ops: int, logger) -> List[bytes]:
+    """Keeps the generated lines from `results`, logging each failure's reason."""
+    batch = []
+    for result in results:
+        if isinstance(result, bytes):
+            batch.append(result)
+        else:
+            logger.warning(f"Generation failed for ops={current_ops}: {result}. Retrying...")
+    return batch
+
+def build_test_set(max_ops: int, problems_per_level: int, step_size: int = 2, workers: Optional[int] = None):
     """
     Generates a stratified benchmark test set based on Operation Count (Linear Scaling).
     
@@ -25,7 +72,9 @@ def build_test_set(max_ops: int, problems_per_level: int, step_size: int = 2):
         max_ops (int): The maximum number of operations to test (e.g., 30).
         problems_per_level (int): Number of problems to generate for each complexity step.
         step_size (int): The interval between complexity steps (e.g., 2 -> 1 op, 3 ops, 5 ops...).
+        workers (int): Worker processes generating levels in parallel (default: one per CPU).
     """
+    logger = get_logger()
     
     # 1. Setup Timestamp & Filename
     run_timestamp = get_run_timestamp()
@@ -51,44 +100,54 @@ def build_test_set(max_ops: int, problems_per_level: int, step_size: int = 2):
     logger.info(f"Params: Linear scaling 1 to {max_ops} ops, Step={step_size}, N={problems_per_level}")
 
     total_problems = 0
+    bytes_written = 0
     
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            
-            # --- LOOP: Iterate by Operation Count (Linear) ---
-            # Start at 1 op, go up to max_ops, jumping by step_size
-            for current_ops in range(1, max_ops + 1, step_size):
-                logger.info(f"Generating problems for Complexity: {current_ops} operations...")
-
-                generated_count = 0
-                
-                while generated_count < problems_per_level:
-                    try:
-                        # Call the NEW linear generator
-                        problem_str, correct_answer = generate_problem_by_ops(current_ops)
-
-                        # Create the JSON data entry
-                        # We use 'level' to store the Op Count so downstream tools (evaluator)
-                        # don't need to change their variable names yet.
-                        data_entry = {
-                            "level": current_ops,  # Represents Complexity (Num Ops)
-                            "problem": problem_str,
-                            "answer": correct_answer
-                        }
-
-                        # Write to file
-                        f.write(json.dumps(data_entry) + "\n")
-                        total_problems += 1
-                        generated_count += 1
-                        
-                    except ValueError as ve:
-                        logger.warning(f"Generation failed for ops={current_ops}: {ve}. Retrying...")
-                        continue
-                    except Exception as gen_e:
-                        logger.error(f"Unexpected error at ops={current_ops}: {gen_e}", exc_info=True)
-                        continue
-
-                logger.info(f" -> Generated {generated_count} problems for {current_ops} ops.")
+        # --- LOOP: Iterate by Operation Count (Linear) ---
+        # Start at 1 op, go up to max_ops, jumping by step_size.
+        # Each level is one pool.map, and the next level is queued before
+        # this one is drained, so workers stay busy across level boundaries
+        # while at most two levels of results are held. Levels are drained
+        # in order, so the file stays in level order.
+        levels = range(1, max_ops + 1, step_size)
+        pending: List[bytes] = []
+
+        fd = os.open(OUTPUT_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=seed_generators) as pool:
+                def _submit(ops: int, count: int):
+                    return pool.map(_generate_entry, [ops] * count, chunksize=MAP_CHUNKSIZE)
+
+                results = _submit(levels[0], problems_per_level) if levels else None
+                for k, current_ops in enumerate(levels):
+                    next_results = _submit(levels[k + 1], problems_per_level) if k + 1 < len(levels) else None
+                    batch = _collect(results, current_ops, logger)
+                    results = next_results
+
+                    # Failures are rare, so a short level is topped up with a
+                    # few bounded rounds instead of retrying problem by problem
+                    for _ in range(MAX_TOP_UPS):
+                        missing = problems_per_level - len(batch)
+                        if not missing:
+                            break
+                        batch += _collect(_submit(current_ops, missing), current_ops, logger)
+                    if len(batch) < problems_per_level:
+                        logger.warning(
+                            f"Giving up on ops={current_ops} after {MAX_TOP_UPS} top-ups: "
+                            f"{problems_per_level - len(batch)} problems short ({len(batch)}/{problems_per_level})."
+                        )
+
+                    pending.extend(batch)
+                    total_problems += len(batch)
+                    bytes_written += sum(map(len, batch))
+                    if len(pending) >= WRITE_BATCH:
+                        write_lines(fd, pending)
+                        pending.clear()
+                    logger.info(f" -> Generated {len(batch)} problems for {current_ops} ops.")
+
+            write_lines(fd, pending)
+        finally:
+            os.close(fd)
 
     except IOError as e:
         logger.error(f"Could not write to file {OUTPUT_FILE}. {e}", exc_info=True)
@@ -100,12 +159,15 @@ def build_test_set(max_ops: int, problems_per_level: int, step_size: int = 2):
     # 4. Final Verification
     logger.info(f"\nSuccessfully generated {total_problems} problems.")
     logger.info(f"Test set saved to: {OUTPUT_FILE}")
-    
-    if os.path.exists(OUTPUT_FILE):
-        file_size = os.path.getsize(OUTPUT_FILE)
-        logger.info(f"File verified: {file_size} bytes")
-    else:
-        logger.error(f"File was not created at expected location: {OUTPUT_FILE}")
+
+    # Every byte went through write_lines, which finishes short writes, so the
+    # running count is the file size; stat it only when debugging
+    logger.info("Wrote %d bytes", bytes_written)
+    if logger.isEnabledFor(logging.DEBUG):
+        if not os.path.exists(OUTPUT_FILE):
+            logger.error(f"File was not created at expected location: {OUTPUT_FILE}")
+        else:
+            logger.debug("Size on disk: %d bytes", os.path.getsize(OUTPUT_FILE))
     
     logger.info("--- [Build Complete] ---")
 
@@ -127,6 +189,13 @@ if __name__ == "__main__":
         help='Number of problems to generate per complexity step. Default: 10'
     )
     
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=None,
+        help='Worker processes used to generate levels in parallel. Default: one per CPU'
+    )
+    
     parser.add_argument(
         '-s', '--step',
         type=int,
@@ -140,5 +209,6 @@ if __name__ == "__main__":
     build_test_set(
         max_ops=args.max_ops, 
         problems_per_level=args.num_problems, 
-        step_size=args.step
+        step_size=args.step,
+        workers=args.workers
     )
\ No newline at end of file
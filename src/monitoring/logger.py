@@ -1,15 +1,98 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime ## Added import
 from typing import Optional   ## Added import
 
 _configured_logger = None
 _run_timestamp = None
+_listener = None       # QueueListener doing formatting + I/O on a background thread
+_queue_handler = None  # The only handler on the root logger; it just enqueues records
+
+# The format uses none of these, so skip looking them up for every record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+
+LOG_BUFFER_SIZE = 128 * 1024
+
+
+class _BufferedFileHandler(logging.StreamHandler):
+    """
+    Appends records to `filename` as UTF-8 bytes through a LOG_BUFFER_SIZE
+    buffer: one encode per record, no text layer, and no flush per record.
+    WARNING and above are flushed at once so problems are on disk promptly;
+    the rest reach the file as the buffer fills and at shutdown.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__(open(filename, 'ab', buffering=LOG_BUFFER_SIZE))
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write((self.format(record) + self.terminator).encode('utf-8'))
+            if record.levelno >= logging.WARNING:
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            try:
+                self.flush()
+            finally:
+                self.stream.close()
+        finally:
+            self.release()
+            super().close()
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records unformatted, so `msg % args` and traceback text are
+    built on the listener thread. The stock prepare() formats on the
+    caller's thread to make records picklable, which an in-process
+    SimpleQueue does not need.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _stop_listener():
+    """Drains queued records into the real handlers. Registered with atexit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _log_directly_in_child():
+    """
+    A forked child (e.g. a ProcessPoolExecutor worker) has no listener thread,
+    and may exit without running atexit, so it writes to the handlers directly.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+    _listener = _queue_handler = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_directly_in_child)
 
 def setup_logger(run_timestamp_str: Optional[str] = None) -> logging.Logger:
     
-    global _configured_logger, _run_timestamp
+    global _configured_logger, _run_timestamp, _listener, _queue_handler
     if _configured_logger:
         
         return _configured_logger
@@ -45,11 +128,14 @@ def setup_logger(run_timestamp_str: Optional[str] = None) -> logging.Logger:
 
     logger_instance.setLevel(logging.INFO) # Set the minimum level to log
 
+    # Callers only enqueue records; formatting and both writes happen on the
+    # listener's thread, so logging never blocks on I/O in the hot loops
+    handlers = []
     try:
-        file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+        file_handler = _BufferedFileHandler(log_file)
         file_handler.setFormatter(formatter)
         file_handler.setLevel(logging.INFO) # Log info and above to file
-        logger_instance.addHandler(file_handler)
+        handlers.append(file_handler)
     except IOError as e:
         print(f"CRITICAL: Could not open log file {log_file} for writing. {e}")
         # Continue with just console logging if file fails, but log the error
@@ -57,7 +143,14 @@ def setup_logger(run_timestamp_str: Optional[str] = None) -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO) # Log info and above to console
-    logger_instance.addHandler(console_handler)
+    handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _LocalQueueHandler(log_queue)
+    logger_instance.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
 
     _configured_logger = logger_instance # Store the configured instance
     _configured_logger.info(f"Logger initialized. Logging to console and {log_file}")
@@ -1,37 +1,63 @@
+import atexit
 import json
+import logging
 import os
-import sys
+import queue
+import threading
+import time
 from typing import Optional
 
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.monitoring.logger import setup_logger
+from src.utils import json_dumps_line, write_lines
 
+logger = logging.getLogger(__name__)
 
-try:
-    from src.monitoring.logger import logger
-except ImportError:
-   
-    import logging
-    logger = logging.getLogger(__name__)
+FLUSH_EVERY = 16       # records per flush + fsync
+FLUSH_INTERVAL = 1.0   # seconds a written record may wait for its flush
+
+
+_STOP = object()  # Sentinel telling the writer thread to drain and exit
+
+# Record keys, in the order log_result enqueues their values
+_FIELDS = ("level", "problem", "ground_truth", "model_answer", "is_correct", "raw_response")
 
 
 class ResultTracker:
+    """
+    Appends results to a JSONL file from a background writer thread.
+
+    Records are group-committed: every `flush_every` records, or when one
+    has waited `flush_interval` seconds, the batch goes out in one write and
+    is fsynced. Larger batches mean fewer syscalls and fsyncs per record, at
+    the cost of losing up to one batch if the process dies without close()
+    (which atexit also runs); flush() forces a commit at any time.
+    """
      
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, flush_every: int = FLUSH_EVERY, flush_interval: float = FLUSH_INTERVAL):
        
         self.filepath = filepath
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
         self._prepare_directory()
 
+        # log_result only enqueues; a single background thread owns the file
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="ResultTrackerWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
     def _prepare_directory(self):
        
         directory = os.path.dirname(self.filepath)
         try:
             os.makedirs(directory, exist_ok=True)
             # Test write access by opening the file in append mode
-            with open(self.filepath, 'a', encoding='utf-8') as f:
+            with open(self.filepath, 'ab'):
                 pass
-            logger.info(f"ResultTracker initialized. Logging results to {self.filepath}")
+            logger.info("ResultTracker initialized. Logging results to %s", self.filepath)
         except (OSError, IOError) as e:
-            logger.error(f"Failed to create/access tracker file at {self.filepath}. {e}")
+            logger.error("Failed to create/access tracker file at %s. %s", self.filepath, e)
             raise  # Stop the program if we can't write results
 
     def log_result(
@@ -44,26 +70,84 @@ class ResultTracker:
         raw_response: Optional[str] = None  # <--- 1. ADD THIS ARGUMENT
     ):
         
-        result_entry = {
-            "level": level,
-            "problem": problem,
-            "ground_truth": ground_truth,
-            "model_answer": model_answer,
-            "is_correct": is_correct,
-            "raw_response": raw_response  # <--- 2. ADD THIS LINE
-        }
-        
+        # A plain tuple in field order; the writer thread fills its record dict from it
+        self._queue.put((level, problem, ground_truth, model_answer, is_correct, raw_response))
+
+    def _write_loop(self):
+        pending = []  # encoded records since the last flush
+        last_flush = time.monotonic()
+        # One dict reused for every record: only this thread touches it, and
+        # each record is fully serialised before the next overwrites it
+        result_entry = dict.fromkeys(_FIELDS)
+        # Unbuffered: batches go straight to the fd with one writev each
+        with open(self.filepath, 'ab', buffering=0) as f:
+            while True:
+                # With records pending, wake up in time to honour flush_interval
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush)) if pending else None
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    record = None
+                if record is _STOP:
+                    break
+                if isinstance(record, threading.Event):
+                    # flush() request: commit everything queued before it, then wake the caller
+                    last_flush = time.monotonic()
+                    self._flush(f, pending)
+                    record.set()
+                elif record is not None:
+                    result_entry.update(zip(_FIELDS, record))
+                    try:
+                        pending.append(json_dumps_line(result_entry))
+                    except (TypeError, ValueError) as e:
+                        logger.error("Failed to write result to %s: %s", self.filepath, e)
+
+                # Batch flushes so readers (dashboard) see one mtime bump per batch
+                if pending and (len(pending) >= self.flush_every or time.monotonic() - last_flush >= self.flush_interval):
+                    last_flush = time.monotonic()
+                    self._flush(f, pending)
+            self._flush(f, pending)
+
+    def _flush(self, f, pending):
+        """Writes the batch with one gathered write, fsyncs, and empties `pending`."""
+        if not pending:
+            return
         try:
-           
-            with open(self.filepath, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(result_entry) + "\n")
-        except IOError as e:
-            logger.error(f"Failed to write result to {self.filepath}. Data: {result_entry}. {e}")
+            write_lines(f.fileno(), pending)
+            os.fsync(f.fileno())
+        except OSError as e:
+            logger.error("Failed to flush results to %s. %s", self.filepath, e)
+        pending.clear()
+
+    def flush(self):
+        """Blocks until every result logged so far is written and fsynced."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        # A close() racing this call may stop the writer first; its final flush covers us
+        while not done.wait(0.1):
+            if not self._writer.is_alive():
+                return
+
+    def close(self):
+        """Flushes all queued results and stops the writer thread. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def __enter__(self) -> "ResultTracker":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 
 # --- Self-Test Block ---
 if __name__ == "__main__":
-   
+    setup_logger()
     logger.info("--- [ResultTracker Self-Test] ---")
     
     TEST_FILE = "data/results/tracker_selftest.jsonl"
@@ -85,6 +169,7 @@ if __name__ == "__main__":
         tracker.log_result(level=0, problem="1 + 1", ground_truth=2.0, model_answer=2.0, is_correct=True, raw_response="The answer is 2.0")
         tracker.log_result(level=1, problem="(2 * 3)", ground_truth=6.0, model_answer=5.0, is_correct=False, raw_response="I think it is 5")
         tracker.log_result(level=1, problem="(5 - 1)", ground_truth=4.0, model_answer=None, is_correct=False, raw_response="I am not sure.")
+        tracker.close()
         
         logger.info(f"Self-test complete. Please check the file: {TEST_FILE}")
         
@@ -1,60 +1,207 @@
 # src/utils.py
 
 import json
+import logging
 import os
-import glob
-from typing import List, Dict, Any, Optional
-from src.monitoring.logger import get_logger
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+import numpy as np
 from src.config import BENCHMARK_DIR # <-- Import from your new config
 
+# orjson is an optional speed-up; its JSONDecodeError subclasses json.JSONDecodeError
+# and json.loads accepts bytes, so callers can treat both parsers the same way.
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps_line(obj: Any) -> bytes:
+        """Serializes `obj` to one newline-terminated UTF-8 JSONL record."""
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+
+    def json_dumps(obj: Any) -> str:
+        """Serializes `obj` to a compact JSON string (e.g. for log messages)."""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+    def json_dumps_line(obj: Any) -> bytes:
+        """Serializes `obj` to one newline-terminated UTF-8 JSONL record."""
+        return (json.dumps(obj) + "\n").encode('utf-8')
+
+    def json_dumps(obj: Any) -> str:
+        """Serializes `obj` to a compact JSON string (e.g. for log messages)."""
+        return json.dumps(obj, separators=(',', ':'))
+
+logger = logging.getLogger(__name__)
+
+# Scatter-gather writes hand the kernel a list of buffers in one syscall, with
+# no userspace join. The per-call buffer count is capped at IOV_MAX.
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def write_all(fd: int, data) -> None:
+    """Writes all of `data` to the raw descriptor `fd`, retrying short os.write calls."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def write_lines(fd: int, lines: List[bytes]) -> None:
+    """Writes `lines` back to back to the raw descriptor `fd`, via os.writev where available."""
+    if not hasattr(os, 'writev'):
+        write_all(fd, b"".join(lines))
+        return
+    for start in range(0, len(lines), _IOV_MAX):
+        chunk = lines[start:start + _IOV_MAX]
+        written = os.writev(fd, chunk)
+        # A short writev leaves the rest of the chunk; finish it with plain
+        # writes from the first partial line, without joining the chunk
+        if written < sum(map(len, chunk)):
+            for line in chunk:
+                if written >= len(line):
+                    written -= len(line)
+                    continue
+                write_all(fd, memoryview(line)[written:])
+                written = 0
+
+
+# 64KB reads cut syscalls ~8x versus the 8KB default; past BULK_READ_LIMIT
+# the file is streamed through that buffer instead of read into memory whole.
+READ_BUFFER_SIZE = 64 * 1024
+BULK_READ_LIMIT = 64 * 1024 * 1024
+
+
+
+@dataclass
+class Benchmark:
+    """
+    Struct-of-arrays view of a benchmark file: problem i is
+    (levels[i], problems[i], answers[i]).
+    """
+    levels: np.ndarray    # int32 complexity (ops count) per problem
+    problems: List[str]
+    answers: np.ndarray   # float64 ground truth per problem
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "Benchmark":
+        n = len(rows)
+        return cls(
+            levels=np.fromiter((row['level'] for row in rows), dtype=np.int32, count=n),
+            problems=[row['problem'] for row in rows],
+            answers=np.fromiter((row['answer'] for row in rows), dtype=np.float64, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.problems)
+
+
+_SKIP = object()  # Placeholder _decode_lines yields for blank or undecodable lines
+
+
+def _decode_lines(lines: Iterable[bytes]) -> Iterator[Any]:
+    """Decodes each JSONL line, yielding _SKIP (after a warning if invalid) for lines without a record."""
+    for line_num, line in enumerate(lines, 1):
+        # Lines go to the parser as raw bytes; it tolerates the trailing newline
+        if not line or line.isspace():
+            yield _SKIP
+            continue
+        try:
+            yield json_loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning("Skipping invalid JSON line %d: '%s'. %s", line_num, line.strip().decode('utf-8', 'replace'), e)
+            yield _SKIP
+
+
 # --- Move the entire function from main.py here ---
 
-def load_benchmark() -> Optional[List[Dict[str, Any]]]:
+def load_benchmark() -> Optional[Benchmark]:
     """
     Step 1: Loads the LATEST benchmark problem file from the directory.
     """
-    logger = get_logger()
     logger.info("--- [Step 1: Load Benchmark] ---")
 
-    # Use the imported config path
-    list_of_files = glob.glob(os.path.join(BENCHMARK_DIR, 'stratified_benchmark_*.jsonl'))
-    if not list_of_files:
-        logger.error(f"No benchmark files found in {BENCHMARK_DIR}")
-        logger.error("Please run 'python -m src.generation.test_builder' first.")
+    try:
+        # Single directory pass; DirEntry caches the stat result it was listed with
+        latest_file = None
+        latest_ctime = -1
+        with os.scandir(BENCHMARK_DIR) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('stratified_benchmark_') and name.endswith('.jsonl') and entry.is_file():
+                    ctime = entry.stat().st_ctime_ns
+                    if ctime > latest_ctime:
+                        latest_ctime, latest_file = ctime, entry.path
+    except OSError as e:
+        logger.error("Error finding latest file in %s: %s", BENCHMARK_DIR, e)
         return None
 
-    try:
-        latest_file = max(list_of_files, key=os.path.getctime)
-    except ValueError:
-        logger.error(f"Error finding latest file in {BENCHMARK_DIR}")
+    if latest_file is None:
+        logger.error("No benchmark files found in %s", BENCHMARK_DIR)
+        logger.error("Please run 'python -m src.generation.test_builder' first.")
         return None
 
     filepath = latest_file
-    logger.info(f"Loading latest benchmark file: {os.path.basename(filepath)}")
+    logger.info("Loading latest benchmark file: %s", os.path.basename(filepath))
 
     # Store the loaded file path
     load_benchmark.last_loaded_file = filepath
 
     benchmark = []
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
+        with open(filepath, 'rb', buffering=READ_BUFFER_SIZE) as f:
+            rows = None
+            if os.fstat(f.fileno()).st_size <= BULK_READ_LIMIT:
+                lines = f.read().split(b'\n')
+                if lines and not lines[-1]:
+                    lines.pop()  # The final newline leaves one empty chunk
+                # Fast path: decode every line in one sweep. Any bad or blank
+                # line raises, and the per-line loop below redoes the file with
+                # its warnings; either way row i comes from line i + 1.
+                try:
+                    rows = [json_loads(line) for line in lines]
+                except json.JSONDecodeError:
+                    pass
+            else:
+                lines = f
+            for line_num, row in enumerate(rows if rows is not None else _decode_lines(lines), 1):
+                if row is _SKIP:
+                    continue
+
+                # Validate once here so the evaluation loop can trust every row
+                if not isinstance(row, dict) or not all(k in row for k in ('level', 'problem', 'answer')):
+                    logger.warning("Skipping invalid problem entry on line %d: Missing required keys. Data: %s", line_num, row)
+                    continue
+                try:
+                    row['answer'] = float(row['answer'])
+                except (TypeError, ValueError):
+                    logger.warning("Skipping problem on line %d due to non-numeric ground truth: %s", line_num, row['answer'])
+                    continue
+                # Benchmark stores levels as int32, so a fractional level would be truncated
                 try:
-                    stripped_line = line.strip()
-                    if stripped_line:
-                        benchmark.append(json.loads(stripped_line))
-                except json.JSONDecodeError as e:
-                     logger.warning(f"Skipping invalid JSON line {line_num}: '{line.strip()}'. {e}")
-                     continue
+                    level = int(row['level'])
+                except (TypeError, ValueError, OverflowError):
+                    level = None
+                if level is None or (isinstance(row['level'], float) and level != row['level']):
+                    logger.warning("Skipping problem on line %d due to non-integer level: %s", line_num, row['level'])
+                    continue
+                row['level'] = level
+                benchmark.append(row)
     except IOError as e:
-        logger.error(f"Error reading file {filepath}: {e}", exc_info=True)
+        logger.error("Error reading file %s: %s", filepath, e, exc_info=True)
         return None
     
     if not benchmark:
-        logger.warning(f"Benchmark file {os.path.basename(filepath)} loaded but was empty.")
+        logger.warning("Benchmark file %s loaded but was empty.", os.path.basename(filepath))
         return None
 
-    logger.info(f"Loaded {len(benchmark)} problems from {os.path.basename(filepath)}.")
-    return benchmark
+    logger.info("Loaded %d problems from %s.", len(benchmark), os.path.basename(filepath))
+    return Benchmark.from_rows(benchmark)
 
 load_benchmark.last_loaded_file = "Unknown"
\ No newline at end of file
@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from src.analysis import evaluator
+from src.utils import Benchmark
+
+
+class _AbortingTracker:
+    """Stands in for ResultTracker; raises on the `fail_at`-th logged result."""
+
+    def __init__(self, fail_at: int):
+        self.fail_at = fail_at
+        self.logged = 0
+
+    def log_result(self, **kwargs):
+        self.logged += 1
+        if self.logged == self.fail_at:
+            raise KeyboardInterrupt
+
+
+def test_run_evaluation_stops_calling_api_after_abort(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake_query_model(prompt):
+        with lock:
+            calls.append(prompt)
+        return {'choices': [{'message': {'content': '1'}}]}
+
+    monkeypatch.setattr(evaluator, 'query_model', fake_query_model)
+    n_problems = 200
+    benchmark = Benchmark.from_rows(
+        [{'level': 1, 'problem': f"p{i}", 'answer': 1.0} for i in range(n_problems)]
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        evaluator.run_evaluation(benchmark, _AbortingTracker(fail_at=3), tolerance=1e-6, sleep_time=0.005, concurrency=4)
+
+    # run_evaluation has returned, so no worker is still running
+    made = len(calls)
+    assert made < n_problems
+    threading.Event().wait(0.1)
+    assert len(calls) == made